@@ -8,6 +8,17 @@ class Settings(BaseSettings):
     )
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     API_V1_STR: str = "/api/v1"
+    # When set, the schema is created on startup instead of via Alembic migrations
+    TESTING: bool = os.getenv("TESTING", "false").lower() == "true"
+    # Serve the OpenAPI schema pre-built at image build time; off in development so
+    # a stale static/openapi.json never hides schema changes
+    PREBUILT_OPENAPI: bool = os.getenv("PREBUILT_OPENAPI", "false").lower() == "true"
+    # Postgres connections per process. Every gunicorn worker holds up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW and every arq worker up to PG_POOL_MAX_SIZE more;
+    # see "Connection Pooling" in the README for sizing against max_connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+    PG_POOL_MAX_SIZE: int = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,45 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Optional
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Statements of the same shape share one compiled form in SQLAlchemy's statement cache,
+# and asyncpg keeps them prepared per connection, so repeated queries skip parse/plan.
+# Connections are recycled instead of pinged, saving a round trip per checkout.
+# Pool sizes are per process, so they are configured against the worker count.
+engine = create_async_engine(
+    settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://'),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=False,
+    pool_recycle=1800,
+    connect_args={"prepared_statement_cache_size": 500},
+)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# asyncpg pool used for COPY-based bulk ingestion; created on application startup.
+pg_pool: Optional[asyncpg.Pool] = None
+
+async def init_pg_pool() -> None:
+    global pg_pool
+    pg_pool = await asyncpg.create_pool(
+        dsn=settings.DATABASE_URL,
+        min_size=min(5, settings.PG_POOL_MAX_SIZE),
+        max_size=settings.PG_POOL_MAX_SIZE,
+    )
+
+async def close_pg_pool() -> None:
+    global pg_pool
+    if pg_pool is not None:
+        await pg_pool.close()
+        pg_pool = None
+
+def get_pg_pool() -> asyncpg.Pool:
+    if pg_pool is None:
+        raise RuntimeError("asyncpg pool is not initialized")
+    return pg_pool
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,12 +1,19 @@
-from fastapi import Body, FastAPI, Depends, HTTPException, BackgroundTasks, Request
+import os
+
+import orjson
+from anyio import to_thread
+from fastapi import Body, FastAPI, Depends, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
 from app import schemas
 from app.config import settings
-from app.database import engine, SessionLocal
+from app.database import engine, get_db
+from app.redis_client import init_arq_pool, close_arq_pool, get_arq_pool
 from app.services.data_organizer import DataOrganizer
 from app.services.query_engine import SmartQueryEngine
 
@@ -18,28 +25,37 @@ from fastapi.openapi.docs import (
 )
 from fastapi.staticfiles import StaticFiles
 
+OPENAPI_URL = "/openapi.json"
+# Pre-built at image build time by write_openapi_schema()
+OPENAPI_SCHEMA_PATH = os.path.join("static", "openapi.json")
+
 app = FastAPI(
     title="Smart Process Analyzer API",
     description="API for analyzing and querying process data",
     version="1.0.0",
-    openapi_url="/openapi.json",
+    openapi_url=None,  # served by openapi_json() below
     docs_url=None,
-    redoc_url=None
+    redoc_url=None,
+    default_response_class=ORJSONResponse,
 )
 
+# Compress larger JSON bodies (e.g. /query results); level 1 keeps the CPU cost low
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 @app.on_event("startup")
 async def startup_event():
-    models.Base.metadata.drop_all(bind=engine)
-    models.Base.metadata.create_all(bind=engine)
-    print("Database initialized successfully.")
-
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    # Threadpool used for sync work (parsing, run_in_threadpool); anyio defaults to 40
+    to_thread.current_default_thread_limiter().total_tokens = 64
+    # The schema is managed by Alembic migrations (`alembic upgrade head`) at deploy time
+    if settings.TESTING:
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        print("Database initialized successfully.")
+    await init_arq_pool()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_arq_pool()
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -50,26 +66,69 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 @app.post(f"{settings.API_V1_STR}/ingest", response_model=schemas.IngestDataResponse)
-async def ingest_data(data: schemas.IngestDataRequest, background_tasks: BackgroundTasks):
+async def ingest_data(data: schemas.IngestDataRequest):
     """
     Ingest process data.
 
     - **os_type**: Type of operating system (e.g., 'windows', 'linux')
     - **content**: Raw process data content
-    - **meta_info**: Metadata about the ingested data
+    - **meta_info**: Metadata about the ingested data. Its timestamp is stored in UTC;
+      a timestamp without a UTC offset is taken to be UTC, not server local time
     """
     try:
         batch_id, num_of_records = await DataOrganizer.receive_and_parse_data(data.dict())
-        background_tasks.add_task(DataOrganizer.process_and_store_data, batch_id)
+        await get_arq_pool().enqueue_job('process_and_store_data', batch_id)
+        return schemas.IngestDataResponse(
+            message="Data received and processing started",
+            records_processed=num_of_records
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post(f"{settings.API_V1_STR}/ingest_stream", response_model=schemas.IngestDataResponse)
+async def ingest_stream(
+    request: Request,
+    os_type: str,
+    timestamp: str,
+    machine_name: str,
+    machine_id: str,
+):
+    """
+    Ingest process data streamed as the raw request body (plain text, not JSON).
+
+    - **os_type**: Type of operating system (currently unix-like systems only)
+    - **timestamp**: Time the process data was collected, taken to be UTC when it has no UTC offset
+    - **machine_name**: Name of the machine the data comes from
+    - **machine_id**: ID of the machine the data comes from
+    """
+    meta_info = {
+        "timestamp": timestamp,
+        "machine_name": machine_name,
+        "machine_id": machine_id,
+        "os_type": os_type,
+    }
+    try:
+        batch_id, num_of_records = await DataOrganizer.receive_and_parse_stream(os_type, meta_info, request.stream())
+        await get_arq_pool().enqueue_job('process_and_store_data', batch_id)
         return schemas.IngestDataResponse(
             message="Data received and processing started",
             records_processed=num_of_records
         )
+    except HTTPException:
+        raise
+    except (NotImplementedError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post(f"{settings.API_V1_STR}/query", response_model=schemas.QueryResponse)
-async def query_data(query_params: schemas.QueryParams = Body(...), db: Session = Depends(get_db)):
+# Records come straight from the database, so skip response_model validation;
+# the schema is still documented through `responses`.
+@app.post(
+    f"{settings.API_V1_STR}/query",
+    response_class=ORJSONResponse,
+    responses={200: {"model": schemas.QueryResponse}},
+)
+async def query_data(query_params: schemas.QueryParams = Body(...), db: AsyncSession = Depends(get_db)):
     """
     Query process data based on specified parameters.
 
@@ -78,28 +137,35 @@ async def query_data(query_params: schemas.QueryParams = Body(...), db: Session
     - **os_type**: Type of operating system to filter by
     - **machine_id**: ID of the machine to filter by
     - **command**: Name of the process to filter by
+    - **command_match**: How to match command: 'contains' (default), 'prefix' or 'similar' (trigram similarity).
+      Commands shorter than 3 characters cannot use the trigram index and are slower to match
     - **cpu_usage_gt**: Filter for CPU usage greater than this value
     - **memory_usage_gt**: Filter for memory usage greater than this value
     - **limit**: Maximum number of records to return
     - **offset**: Number of records to skip
+
+    Times without a UTC offset are taken to be UTC, not server local time; the default
+    range is the last 30 days up to the current UTC time.
+
+    total_count is null (and X-Total-Count omitted) when offset is past the last result.
     """
     try:
-        total_count, records = SmartQueryEngine.execute_query(query_params.model_dump(), db)
-        return schemas.QueryResponse(
-            total_count=total_count,
-            records=records
-        )
+        params = query_params.model_dump()
+        total_count, records = await SmartQueryEngine.execute_query(params, db)
+        headers = {"X-Total-Count": str(total_count)} if total_count is not None else None
+        return ORJSONResponse(content={"total_count": total_count, "records": records}, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get(f"{settings.API_V1_STR}/process/{{process_id}}", response_model=schemas.ProcessDataResponse)
-async def get_process(process_id: int, db: Session = Depends(get_db)):
+async def get_process(process_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a specific process by its ID.
 
     - **process_id**: The ID of the process to retrieve
     """
-    process = db.query(models.ProcessData).filter(models.ProcessData.id == process_id).first()
+    result = await db.execute(select(models.ProcessData).where(models.ProcessData.id == process_id))
+    process = result.scalar_one_or_none()
     if process is None:
         raise HTTPException(status_code=404, detail="Process not found")
     return schemas.ProcessDataResponse(
@@ -117,7 +183,7 @@ async def health_check():
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
     return get_swagger_ui_html(
-        openapi_url=app.openapi_url,
+        openapi_url=OPENAPI_URL,
         title=f"{app.title} - Swagger UI",
         oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
         swagger_js_url="/static/swagger-ui-bundle.js",
@@ -131,14 +197,12 @@ async def swagger_ui_redirect():
 @app.get("/redoc", include_in_schema=False)
 async def redoc_html():
     return get_redoc_html(
-        openapi_url=app.openapi_url,
+        openapi_url=OPENAPI_URL,
         title=f"{app.title} - ReDoc",
         redoc_js_url="/static/redoc.standalone.js",
     )
 
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
+def build_openapi_schema():
     openapi_schema = get_openapi(
         title="Smart Process Analyzer API",
         version="1.0.0",
@@ -146,14 +210,45 @@ def custom_openapi():
         routes=app.routes,
     )
     openapi_schema["openapi"] = "3.0.2"  # Add this line to specify the OpenAPI version
-    app.openapi_schema = openapi_schema
+    return openapi_schema
+
+def write_openapi_schema(path: str = OPENAPI_SCHEMA_PATH):
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(build_openapi_schema()))
+
+def use_prebuilt_openapi() -> bool:
+    return settings.PREBUILT_OPENAPI and not settings.TESTING and os.path.exists(OPENAPI_SCHEMA_PATH)
+
+def custom_openapi():
+    if app.openapi_schema:
+        return app.openapi_schema
+    if use_prebuilt_openapi():
+        with open(OPENAPI_SCHEMA_PATH, "rb") as f:
+            app.openapi_schema = orjson.loads(f.read())
+    else:
+        app.openapi_schema = build_openapi_schema()
     return app.openapi_schema
 
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json():
+    if use_prebuilt_openapi():
+        return FileResponse(OPENAPI_SCHEMA_PATH, media_type="application/json")
+    return custom_openapi()
+
 app.openapi = custom_openapi
 
 # Mount the static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Development entrypoint; production runs under Gunicorn (see gunicorn.conf.py)
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        log_level="warning",
+    )
\ No newline at end of file
@@ -1,27 +1,43 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import DDL, Column, Integer, String, Float, DateTime, Index, event, text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 class ProcessData(Base):
     __tablename__ = 'process_data'
+    # Only columns filtered by QueryParams are indexed, shaped after the query predicates
+    __table_args__ = (
+        Index('ix_pd_ts_os', 'timestamp', 'os_type'),
+        Index('ix_pd_machine_ts', 'machine_id', 'timestamp'),
+        # Covers the common os_type + machine_id + time range filter, including the usage thresholds
+        Index(
+            'ix_pd_os_machine_ts', 'os_type', 'machine_id', text('timestamp DESC'),
+            postgresql_include=['cpu_usage', 'mem_usage'],
+        ),
+        Index('ix_pd_cpu', 'cpu_usage', postgresql_where=text('cpu_usage > 0')),
+        # Trigram index serving substring/prefix ILIKE and similarity matches on command
+        Index('ix_pd_command_trgm', 'command', postgresql_using='gin', postgresql_ops={'command': 'gin_trgm_ops'}),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    command = Column(String, index=True)
-    pid = Column(Integer, index=True)
-    vsz = Column(Integer, index=True)
-    rss = Column(Integer, index=True)
-    cpu_usage = Column(Float, index=True)
+    id = Column(Integer, primary_key=True)
+    command = Column(String)
+    pid = Column(Integer)
+    vsz = Column(Integer)
+    rss = Column(Integer)
+    cpu_usage = Column(Float)
     mem_usage = Column(Float, index=True)
-    tty = Column(String, index=True)
-    stat = Column(String, index=True)
-    start_time = Column(String, index=True)
-    duration = Column(String, index=True)
+    tty = Column(String)
+    stat = Column(String)
+    start_time = Column(String)
+    duration = Column(String)
     user = Column(String)
     
-    timestamp = Column(DateTime, index=True)
-    machine_name = Column(String, index=True)
-    machine_id = Column(String, index=True)
+    timestamp = Column(DateTime)
+    machine_name = Column(String)
+    machine_id = Column(String)
     os_type = Column(String)
 
     def to_dict(self):
@@ -42,3 +58,38 @@ class ProcessData(Base):
             "machine_id": self.machine_id,
             "os_type": self.os_type
         }
+
+
+# gin_trgm_ops needs pg_trgm; only relevant when the schema is created without Alembic (TESTING)
+event.listen(
+    Base.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'),
+)
+
+def as_utc_naive(value: datetime) -> datetime:
+    """
+    Normalize a datetime to naive UTC, the form ProcessData.timestamp is stored in.
+    Naive values are taken to already be UTC.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+@dataclass(slots=True)
+class ProcessRow:
+    """
+    Lightweight representation of a parsed process, passed from the parsers to Redis.
+    ProcessData is reserved for the SQL table itself.
+    """
+    user: str
+    pid: int
+    cpu_usage: float
+    mem_usage: float
+    vsz: int
+    rss: int
+    tty: str
+    stat: str
+    start_time: str
+    duration: str
+    command: str
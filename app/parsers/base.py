@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import List
-from app.models import ProcessData
+from typing import Iterable, Iterator, List
+from app.models import ProcessRow
 
 class Parser(ABC):
     @abstractmethod
-    def parse(self, content: str) -> List[ProcessData]:
-        pass
\ No newline at end of file
+    def parse(self, content: str) -> List[ProcessRow]:
+        pass
+
+    def parse_lines(self, lines: Iterable[str]) -> Iterator[ProcessRow]:
+        """
+        Lazily parse data lines (header excluded), for streamed input.
+        Parsers that need the whole document override only parse().
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streamed input")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from app.parsers.unix_parser import UnixParser
 from app.parsers.windows_parser import WindowsParser
 
@@ -5,9 +7,15 @@ from app.parsers.windows_parser import WindowsParser
 class ParserFactory:
     @staticmethod
     def get_parser(os_type: str):
-        if os_type.lower() in ['linux', 'unix', 'mac']:
+        return ParserFactory._get_parser(os_type.lower())
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _get_parser(os_type: str):
+        # Parsers are stateless, so one shared instance per OS type is enough
+        if os_type in ('linux', 'unix', 'mac'):
             return UnixParser()
-        elif os_type.lower() == 'windows':
+        elif os_type == 'windows':
             return WindowsParser()
         else:
             raise ValueError(f"Unsupported OS type: {os_type}")
\ No newline at end of file
@@ -1,10 +1,9 @@
 from enum import Enum
-import re
 
 from fastapi import HTTPException
-from app.models import ProcessData
+from app.models import ProcessRow
 from app.parsers.base import Parser
-from typing import List, Dict, Any
+from typing import Iterable, Iterator, List
 
 class UnixPsFields(Enum):
     USER = 0
@@ -19,44 +18,57 @@ class UnixPsFields(Enum):
     TIME = 9
     COMMAND = 10
 
+# Split at most this many times so the command (with its spaces) stays one field
+_MAX_SPLIT = UnixPsFields.COMMAND.value
+
 
 class UnixParser(Parser):
-    def parse(self, content: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def parse(content: str) -> List[ProcessRow]:
         """
-        Parse the output of 'ps auxww' command and create ProcessRecord objects.
+        Parse the output of 'ps auxww' command into process rows.
 
         Args:
             output (str): The output of 'ps auxww' command.
             metadata (Dict): Metadata about the command execution.
 
         Returns:
-            List[ProcessRecord]: A list of ProcessRecord objects.
+            List[ProcessRow]: A list of parsed process rows.
         """
         lines = content.strip().split('\n')[1:]  # Skip the header
-        process_datas = []
 
         if not lines:
             raise HTTPException(status_code=400, detail="psaux Content is invalid.")
 
-        for line in lines:
-            fields = re.split(r'\s+', line.strip())
+        return list(UnixParser.parse_lines(lines))
 
+    @staticmethod
+    def parse_lines(lines: Iterable[str]) -> Iterator[ProcessRow]:
+        """
+        Lazily parse 'ps auxww' data lines (header excluded) into process rows.
+
+        Args:
+            lines (Iterable[str]): The data lines of the 'ps auxww' output.
+
+        Yields:
+            ProcessRow: One parsed process row per line.
+        """
+        for line in lines:
             try:
-                process_data = ProcessData(
-                    user=fields[UnixPsFields.USER.value],
-                    pid=int(fields[UnixPsFields.PID.value]),
-                    cpu_usage=float(fields[UnixPsFields.CPU.value]),
-                    mem_usage=float(fields[UnixPsFields.MEM.value]),
-                    vsz=int(fields[UnixPsFields.VSZ.value]),
-                    rss=int(fields[UnixPsFields.RSS.value]),
-                    tty=fields[UnixPsFields.TTY.value],
-                    stat=fields[UnixPsFields.STAT.value],
-                    start_time=fields[UnixPsFields.START.value],
-                    duration=fields[UnixPsFields.TIME.value],
-                    command=' '.join(fields[UnixPsFields.COMMAND.value:])
+                user, pid, cpu, mem, vsz, rss, tty, stat, start, duration, *command = line.split(None, _MAX_SPLIT)
+                process_data = ProcessRow(
+                    user=user,
+                    pid=int(pid),
+                    cpu_usage=float(cpu),
+                    mem_usage=float(mem),
+                    vsz=int(vsz),
+                    rss=int(rss),
+                    tty=tty,
+                    stat=stat,
+                    start_time=start,
+                    duration=duration,
+                    command=command[0].rstrip() if command else '',
                 )
-                process_datas.append(process_data)  # Collect ProcessRecord instances
             except Exception:
                 raise HTTPException(status_code=400, detail="psaux Content is invalid.")
-
-        return process_datas
\ No newline at end of file
+            yield process_data
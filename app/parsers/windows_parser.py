@@ -1,5 +1,8 @@
+import io
+
+import pandas as pd
 from fastapi import HTTPException
-from app.models import ProcessData
+from app.models import ProcessRow
 from app.parsers.base import Parser
 from typing import List
 from enum import Enum
@@ -12,17 +15,20 @@ class WindowsTasklistFields(Enum):
     SESSION = 3
     MEM_USAGE = 4
 
+_COLUMN_NAMES = [field.name for field in WindowsTasklistFields]
+
 class WindowsParser(Parser):
-    def parse(self, content: str) -> List[ProcessData]:
+    @staticmethod
+    def parse(content: str) -> List[ProcessRow]:
         """
-        Parse the content of 'tasklist' command and create ProcessRecord objects.
+        Parse the content of 'tasklist' command into process rows.
 
         Args:
             oucontenttput (str): The content of 'tasklist' command.
             meta_info (MetaInfo): Metadata about the command execution.
 
         Returns:
-            List[ProcessRecord]: A list of ProcessRecord objects.
+            List[ProcessRow]: A list of parsed process rows.
         """
         lines = content.splitlines()
 
@@ -45,35 +51,48 @@ class WindowsParser(Parser):
             if char == '=' and (i == 0 or separator[i - 1] != '='):
                 column_positions.append(i)
 
+        # Fixed-width column boundaries, the last column runs to the end of the line
+        colspecs = [(column_positions[i], column_positions[i + 1]) for i in range(len(column_positions) - 1)]
+        colspecs.append((column_positions[-1], None))
+
+        data_lines = [line for line in data_lines if line.strip()]
+        if not data_lines:
+            return []
+
+        try:
+            df = pd.read_fwf(
+                io.StringIO('\n'.join(data_lines)),
+                colspecs=colspecs,
+                header=None,
+                names=_COLUMN_NAMES,
+                dtype=str,
+                keep_default_na=False,
+            )
+            df['PID'] = df['PID'].astype(int)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Tasklist Content is invalid.")
+
+        #  In tasklist mem_usage can be N/A
+        df['MEM_USAGE'] = pd.to_numeric(
+            df['MEM_USAGE'].str.replace(r'[,K\s]', '', regex=True),
+            errors='coerce',
+        ).fillna(0.0).astype(float)
+
         process_datas = []
 
-        for line in data_lines:
-            try:
-                fields = [line[column_positions[i]:column_positions[i+1]].strip()
-                        for i in range(len(column_positions) - 1)] + [line[column_positions[-1]:].split()[0]]
-
-                mem_usage = fields[WindowsTasklistFields.MEM_USAGE.value]
-
-                #  In tasklist mem_usage can be N/A
-                try:
-                    mem_usage = float(mem_usage.replace(',', '').replace('K', ''))
-                except Exception:
-                    mem_usage = float(0.0)
-
-                process_data = ProcessData(
-                    user="N/A",  # Tasklist doesn't provide user information
-                    pid=int(fields[WindowsTasklistFields.PID.value]),
-                    cpu_usage=0.0,  # Tasklist doesn't provide CPU usage
-                    mem_usage=mem_usage,
-                    vsz=0,  # Tasklist doesn't provide VSZ
-                    rss=0,  # Tasklist doesn't provide RSS
-                    tty=fields[WindowsTasklistFields.SESSION_NAME.value],
-                    stat="N/A",  # Tasklist doesn't provide status
-                    start_time="N/A",  # Tasklist doesn't provide start time
-                    duration="N/A",  # Tasklist doesn't provide duration time
-                    command=fields[WindowsTasklistFields.IMAGE_NAME.value],
-                )
-                process_datas.append(process_data)  # Collect ProcessRecord instances
-            except Exception:
-                raise HTTPException(status_code=400, detail="Tasklist Content is invalid.")
+        for image_name, pid, session_name, _session, mem_usage in df.itertuples(index=False, name=None):
+            process_data = ProcessRow(
+                user="N/A",  # Tasklist doesn't provide user information
+                pid=pid,
+                cpu_usage=0.0,  # Tasklist doesn't provide CPU usage
+                mem_usage=mem_usage,
+                vsz=0,  # Tasklist doesn't provide VSZ
+                rss=0,  # Tasklist doesn't provide RSS
+                tty=session_name,
+                stat="N/A",  # Tasklist doesn't provide status
+                start_time="N/A",  # Tasklist doesn't provide start time
+                duration="N/A",  # Tasklist doesn't provide duration time
+                command=image_name,
+            )
+            process_datas.append(process_data)
         return process_datas
\ No newline at end of file
@@ -1,4 +1,47 @@
+from typing import Optional
+
 import redis
+import redis.asyncio
+from arq.connections import ArqRedis, RedisSettings, create_pool
 from app.config import settings
 
-redis_client = redis.Redis.from_url(settings.REDIS_URL)
+# Values are returned as raw bytes so orjson.loads can parse them without a decode step
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=False)
+async_redis_client = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=False)
+
+def aggregation_key_prefix(partition_date: str) -> str:
+    """
+    Common prefix of the aggregate keys of one date. The date is a hash tag, so every
+    OS of one day lands in the same Redis Cluster slot and can be read together.
+    """
+    return f"agg:{{{partition_date}}}:"
+
+def aggregation_key(partition_date: str, os_type: str) -> str:
+    """Redis key of a (date, os_type) partition's aggregates."""
+    return aggregation_key_prefix(partition_date) + os_type
+
+# Suffixes of a partition's aggregate structures. Every ingest batch adds to them,
+# so they always cover the whole day rather than the last batch only.
+AGG_TOTALS = ':totals'          # hash of summed usage, incremented with HINCRBYFLOAT
+AGG_COMMANDS = ':commands'      # set of distinct commands
+AGG_TOP_CPU = ':top_cpu'        # sorted set of command -> peak cpu usage
+AGG_TOP_MEMORY = ':top_memory'  # sorted set of command -> peak memory usage
+AGG_TOP_N = 10
+
+# arq pool used to enqueue batch processing jobs; created on application startup.
+arq_pool: Optional[ArqRedis] = None
+
+async def init_arq_pool() -> None:
+    global arq_pool
+    arq_pool = await create_pool(RedisSettings.from_dsn(settings.REDIS_URL))
+
+async def close_arq_pool() -> None:
+    global arq_pool
+    if arq_pool is not None:
+        await arq_pool.aclose()
+        arq_pool = None
+
+def get_arq_pool() -> ArqRedis:
+    if arq_pool is None:
+        raise RuntimeError("arq pool is not initialized")
+    return arq_pool
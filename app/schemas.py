@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
 # API request and response schemas
 class IngestDataRequest(BaseModel):
@@ -19,6 +19,10 @@ class QueryParams(BaseModel):
     type: Optional[str] = None
     machine_id: Optional[str] = None
     command: Optional[str] = None
+    # How `command` is matched: substring (default), prefix, or pg_trgm similarity.
+    # '%' and '_' match literally; commands shorter than 3 characters cannot use the
+    # trigram index and are answered by a sequential scan.
+    command_match: Literal['contains', 'prefix', 'similar'] = 'contains'
     cpu_usage_gt: Optional[float] = None
     memory_usage_gt: Optional[float] = None
     limit: Optional[int] = 100
@@ -49,7 +53,9 @@ class ProcessData(ProcessDataBase):
         from_attributes = True
 
 class QueryResponse(BaseModel):
-    total_count: int
+    # Matching results before limit/offset. The count is read off the returned rows, so it
+    # is null when the offset is past the last result; X-Total-Count is omitted then.
+    total_count: Optional[int]
     records: List[Union[ProcessData, Dict]]
 
 class ProcessDataResponse(BaseModel):
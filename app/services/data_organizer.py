@@ -1,13 +1,33 @@
 
-import json
-import pandas as pd
+import codecs
+import heapq
+import orjson
 
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Any, AsyncIterator, List, Tuple
 
-from app.database import SessionLocal
-from app.models import ProcessData
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import get_pg_pool
+from app.models import ProcessData, ProcessRow, as_utc_naive
 from app.parsers.parser_factory import ParserFactory
-from app.redis_client import redis_client
+from app.redis_client import (
+    AGG_COMMANDS,
+    AGG_TOP_CPU,
+    AGG_TOP_MEMORY,
+    AGG_TOP_N,
+    AGG_TOTALS,
+    aggregation_key,
+    async_redis_client,
+)
+
+# Columns written by COPY; 'id' is left to the table's serial default.
+_COPY_COLUMNS = [column.name for column in ProcessData.__table__.columns if column.name != 'id']
+
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC
 
 class DataOrganizer:
     """
@@ -15,31 +35,31 @@ class DataOrganizer:
     and updating a SQL database.
     """
     @staticmethod
-    def store_process_data_in_redis(meta_info: Dict[str, Any], process_data_list: List[Dict[str, Any]]) -> str:
+    async def store_process_data_in_redis(meta_info: Dict[str, Any], process_data_list: List[ProcessRow]) -> str:
         """
         Stores process data and associated metadata in Redis.
 
         Args:
             meta_info (Dict[str, Any]): A dictionary containing metadata such as timestamp,
                                           machine name, machine ID, and OS type.
-            process_data_list (List[Dict[str, Any]]): A list of process data dictionaries to store.
+            process_data_list (List[ProcessRow]): A list of parsed process rows to store.
 
         Returns:
             str: A unique batch ID for the stored data.
             int: length of results
         """
-        batch_id = f"batch_{pd.Timestamp.now().strftime('%Y%m%d%H%M%S')}"
+        batch_id = f"batch_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
+        # meta_info is client JSON, so e.g. machine_id may arrive as a number; COPY only
+        # accepts str for the text columns, so the values are stored as strings
         data_to_store = {
             "meta_info": {
-                "timestamp": meta_info['timestamp'],
-                "machine_name": meta_info['machine_name'],
-                "machine_id": meta_info['machine_id'],
-                "os_type": meta_info['os_type'],
+                field: None if meta_info[field] is None else str(meta_info[field])
+                for field in ('timestamp', 'machine_name', 'machine_id', 'os_type')
             },
-            "process_data": [data.to_dict() for data in process_data_list]  # Convert SQLAlchemy object to dict
+            "process_data": process_data_list  # orjson serializes the dataclasses natively
         }
         
-        redis_client.set(batch_id, json.dumps(data_to_store))
+        await async_redis_client.set(batch_id, orjson.dumps(data_to_store, option=_ORJSON_OPTIONS))
         return batch_id, len(process_data_list)
 
     @staticmethod
@@ -64,9 +84,61 @@ class DataOrganizer:
             raise ValueError("Missing required fields: os_type and content")
 
         parser = ParserFactory.get_parser(os_type)
-        parsed_data = parser.parse(raw_content)
+        # Parsing is CPU-bound; keep it off the event loop
+        parsed_data = await run_in_threadpool(parser.parse, raw_content)
 
-        return DataOrganizer.store_process_data_in_redis(meta_info_data, parsed_data)
+        return await DataOrganizer.store_process_data_in_redis(meta_info_data, parsed_data)
+
+    @staticmethod
+    async def receive_and_parse_stream(os_type: str, meta_info: Dict[str, Any], chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        """
+        Parses a streamed raw content body line by line and stores the result in Redis,
+        without holding the whole body in memory as one string.
+
+        Args:
+            os_type (str): Type of operating system the content comes from.
+            meta_info (Dict[str, Any]): Metadata about the ingested data.
+            chunks (AsyncIterator[bytes]): The raw body chunks, e.g. request.stream().
+
+        Returns:
+            str: The batch ID for the stored data in Redis.
+            int: length of results
+
+        Raises:
+            NotImplementedError: If the parser for os_type does not support streamed input.
+        """
+        parser = ParserFactory.get_parser(os_type)
+        parsed_data = []
+        header_skipped = False
+
+        async for lines in DataOrganizer._iter_line_batches(chunks):
+            if not header_skipped and lines:
+                lines = lines[1:]
+                header_skipped = True
+            if lines:
+                parsed_data.extend(await run_in_threadpool(list, parser.parse_lines(lines)))
+
+        if not parsed_data:
+            raise HTTPException(status_code=400, detail="psaux Content is invalid.")
+
+        return await DataOrganizer.store_process_data_in_redis(meta_info, parsed_data)
+
+    @staticmethod
+    async def _iter_line_batches(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+        """
+        Yields the complete non-blank lines of each chunk, carrying a partial
+        trailing line (or split UTF-8 sequence) over to the next chunk. CRLF line
+        endings are accepted.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        pending = ''
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split('\n')
+            yield [line.rstrip('\r') for line in lines if line.strip()]
+        pending += decoder.decode(b'', final=True)
+        if pending.strip():
+            yield [pending.rstrip('\r')]
 
     @staticmethod
     async def process_and_store_data(batch_id: str) -> None:
@@ -79,70 +151,104 @@ class DataOrganizer:
         Returns:
             None
         """
-        raw_data = redis_client.get(batch_id)
+        raw_data = await async_redis_client.get(batch_id)
         
         if not raw_data:
             print(f"No data found for batch_id: {batch_id}")
             return
         try:
-            data = json.loads(raw_data)
+            data = orjson.loads(raw_data)
             if 'process_data' not in data or 'meta_info' not in data:
                 print(f"Missing required keys in the data for batch_id: {batch_id}")
                 return
             
-            for process in data['process_data']:
-                process.update(data['meta_info'])
-            
-            df = pd.DataFrame(data['process_data'])
-            
-            if 'timestamp' not in df.columns:
-                print(f"Missing 'timestamp' column in the data for batch_id: {batch_id}")
+            meta_info = data['meta_info']
+            if 'timestamp' not in meta_info:
+                print(f"Missing 'timestamp' in the meta info for batch_id: {batch_id}")
                 return
+
+            # meta_info is shared by every process in the batch, so parse it once;
+            # stored as naive UTC so partitions and queries agree on day boundaries
+            meta_info['timestamp'] = as_utc_naive(datetime.fromisoformat(meta_info['timestamp']))
+            partition_key = f"{meta_info['timestamp'].strftime('%Y-%m-%d')}_{meta_info['os_type']}"
+
+            records = data['process_data']
+            for process in records:
+                process.update(meta_info)
+                process['partition_key'] = partition_key
+
+            await DataOrganizer._update_sql_database(records)
+            await DataOrganizer._update_redis_aggregations(records)
             
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            df['partition_key'] = df['timestamp'].dt.to_period('D').astype(str) + '_' + df['os_type']
-            
-            DataOrganizer._update_sql_database(df)
-            DataOrganizer._update_redis_aggregations(df)
-            
-            redis_client.delete(batch_id)
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            await async_redis_client.delete(batch_id)
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
             print(f"Error processing data for batch_id {batch_id}: {e}")
 
     @staticmethod
-    def _update_sql_database(df: pd.DataFrame) -> None:
-        session = SessionLocal()
-        try:
-            records = df.to_dict('records')
-            session.bulk_insert_mappings(ProcessData, records)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+    async def _update_sql_database(records: List[Dict[str, Any]]) -> None:
+        """
+        Bulk loads the given records into the process_data table using COPY.
+
+        Args:
+            records (List[Dict[str, Any]]): The process data dictionaries to store.
+
+        Returns:
+            None
+        """
+        if not records:
+            return
+        columns = [column for column in _COPY_COLUMNS if column in records[0]]
+        get_row = itemgetter(*columns)
+        rows = [get_row(record) for record in records]
+        async with get_pg_pool().acquire() as conn:
+            await conn.copy_records_to_table('process_data', records=rows, columns=columns)
 
     @staticmethod
-    def _update_redis_aggregations(df: pd.DataFrame) -> None:
+    async def _update_redis_aggregations(records: List[Dict[str, Any]]) -> None:
         """
-        Updates the SQL database with new records from the given DataFrame.
+        Adds the given records to the per-partition aggregates in Redis. Totals are
+        incremented and distinct commands / peak usages merged, so a partition's
+        aggregates cover every batch ingested for that day.
 
         Args:
-            df (pd.DataFrame): A DataFrame containing the process data to store.
+            records (List[Dict[str, Any]]): Process data dictionaries carrying a 'partition_key'.
 
         Returns:
             None
+        """
+        # One round trip for all partitions
+        pipe = async_redis_client.pipeline(transaction=False)
+        get_partition_key = itemgetter('partition_key')
+        for partition_key, group in groupby(sorted(records, key=get_partition_key), key=get_partition_key):
+            partition = list(group)
+            partition_date, _, os_type = partition_key.partition('_')
+            key = aggregation_key(partition_date, os_type)
+
+            pipe.hincrbyfloat(key + AGG_TOTALS, 'total_cpu_usage', float(sum(process['cpu_usage'] for process in partition)))
+            pipe.hincrbyfloat(key + AGG_TOTALS, 'total_memory_usage', float(sum(process['mem_usage'] for process in partition)))
+            pipe.sadd(key + AGG_COMMANDS, *{process['command'] for process in partition})
+            for suffix, field in ((AGG_TOP_CPU, 'cpu_usage'), (AGG_TOP_MEMORY, 'mem_usage')):
+                # The day's top N is always within the union of the batches' top N, so
+                # merging each batch's top N (keeping the higher peak) and trimming is exact
+                pipe.zadd(key + suffix, DataOrganizer._top_peaks(partition, field), gt=True)
+                pipe.zremrangebyrank(key + suffix, 0, -(AGG_TOP_N + 1))
+        await pipe.execute()
 
-        Raises:
-            Exception: If there's an error during the database transaction.
-        """
-        for partition_key, partition_df in df.groupby('partition_key'):
-            aggregated_data = {
-                'total_cpu_usage': float(partition_df['cpu_usage'].sum()),
-                'total_memory_usage': float(partition_df['mem_usage'].sum()),
-                'process_count': int(partition_df['command'].nunique()),
-                'top_cpu_processes': partition_df.nlargest(10, 'cpu_usage')[['command', 'cpu_usage']].to_dict('records'),
-                'top_memory_processes': partition_df.nlargest(10, 'mem_usage')[['command', 'mem_usage']].to_dict('records')
-            }
-            redis_client.set(f"agg_{partition_key}", json.dumps(aggregated_data))
-        
+    @staticmethod
+    def _top_peaks(partition: List[Dict[str, Any]], field: str) -> Dict[str, float]:
+        """
+        Returns the AGG_TOP_N commands with the highest peak value of the given field.
+
+        Args:
+            partition (List[Dict[str, Any]]): The process data dictionaries of one partition.
+            field (str): The usage field to rank by, e.g. 'cpu_usage'.
+
+        Returns:
+            Dict[str, float]: Peak value by command.
+        """
+        peaks: Dict[str, float] = {}
+        for process in partition:
+            command, value = process['command'], float(process[field])
+            if value > peaks.get(command, float('-inf')):
+                peaks[command] = value
+        return dict(heapq.nlargest(AGG_TOP_N, peaks.items(), key=itemgetter(1)))
@@ -3,14 +3,114 @@ This module implements a SmartQueryEngine for efficient data retrieval and analy
 It supports querying from both pre-aggregated data in Redis and raw data in SQL database.
 """
 
-from typing import List, Dict, Any, Tuple
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import ProcessData
-from app.redis_client import redis_client
-import json
-from functools import lru_cache
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, Float, cast, func, select
+from app.models import ProcessData, as_utc_naive
+from app.redis_client import (
+    AGG_COMMANDS,
+    AGG_TOP_CPU,
+    AGG_TOP_MEMORY,
+    AGG_TOP_N,
+    AGG_TOTALS,
+    aggregation_key_prefix,
+    async_redis_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Priority order for aggregations, as a lookup table instead of a list scan per sort key
+_AGG_PRIORITY = {name: priority for priority, name in enumerate(['count', 'sum', 'avg', 'min', 'max'])}
+_AGG_DEFAULT_PRIORITY = len(_AGG_PRIORITY)
+
+# Column attributes by name, resolved once instead of through hasattr/getattr per query
+_PROCESS_COLUMNS = {column.name: getattr(ProcessData, column.name) for column in ProcessData.__table__.columns}
+
+# Columns returned for raw (ungrouped, unaggregated) records, matching ProcessData.to_dict()
+_RECORD_COLUMNS = tuple(_PROCESS_COLUMNS[name] for name in (
+    'id', 'command', 'pid', 'vsz', 'rss', 'cpu_usage', 'mem_usage', 'tty', 'stat',
+    'start_time', 'user', 'timestamp', 'machine_name', 'machine_id', 'os_type',
+))
+
+# SQLAlchemy aggregation functions by aggregation type
+_AGG_FUNCS = {
+    'avg': func.avg,
+    'max': func.max,
+    'min': func.min,
+    'sum': func.sum,
+    'count': func.count,
+}
+
+# OS types whose partitions are read when a pre-aggregated query has no os_type filter;
+# 'unix' is what clients send for ps output (see ParserFactory)
+_DEFAULT_OS_TYPES = ('windows', 'linux', 'unix', 'mac')
+
+# Rows fetched per round trip when streaming SQL results
+_YIELD_PER = 500
+
+# Label of the window-count column carrying the total result count on every SQL row
+_TOTAL_COUNT_LABEL = '_total_count'
+
+# Aggregations stored per (date, os_type) partition by DataOrganizer
+_PRE_AGGREGATED_AGGS = frozenset({'total_cpu_usage', 'total_memory_usage', 'process_count'})
+
+# SQL equivalents of the pre-aggregated aggregations, used when a query falls back to SQL
+_PRE_AGGREGATED_SQL = {
+    'total_cpu_usage': func.sum(ProcessData.cpu_usage),
+    'total_memory_usage': func.sum(ProcessData.mem_usage),
+    'process_count': func.count(ProcessData.command.distinct()),
+}
+
+# Upper bound on distinct query shapes kept in the plan cache
+_PLAN_CACHE_MAX_SIZE = 256
+
+
+@dataclass(frozen=True)
+class DataSourcePlan:
+    """
+    Which aggregations are served from the pre-aggregated Redis store and which
+    from SQL. A hybrid plan uses both and merges them per (date, os_type).
+    """
+    name: str
+    preagg: FrozenSet[str] = frozenset()
+    sql: FrozenSet[str] = frozenset()
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    The value-independent part of a query: where it runs and which SQL
+    expressions it selects. Shared by every query with the same shape.
+    """
+    data_source: DataSourcePlan
+    group_cols: Tuple[Any, ...] = ()
+    agg_entities: Tuple[Any, ...] = ()
+
+
+_PLAN_CACHE: Dict[tuple, CompiledPlan] = {}
+
+def _is_whole_days(optimized_query: Dict[str, Any]) -> bool:
+    """Whether the query's time range starts and ends at midnight, i.e. covers whole partitions."""
+    return optimized_query['start_time'].time() == time.min and optimized_query['end_time'].time() == time.min
+
+def _partition_dates(optimized_query: Dict[str, Any]) -> List[date]:
+    """
+    Dates of the partitions the query's time range touches. The range is end-exclusive,
+    so an end_time at midnight does not pull in that day's partition.
+    """
+    start_date = optimized_query['start_time'].date()
+    end_date = optimized_query['end_time'].date()
+    if optimized_query['end_time'].time() == time.min:
+        end_date -= timedelta(days=1)
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so the value matches literally."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
 class SmartQueryEngine:
     """
@@ -19,22 +119,23 @@ class SmartQueryEngine:
     """
 
     @staticmethod
-    def execute_query(query_params: Dict[str, Any], db: Session) -> Tuple[int, List[Dict[str, Any]]]:
+    async def execute_query(query_params: Dict[str, Any], db: AsyncSession, now: Optional[datetime] = None) -> Tuple[Optional[int], List[Dict[str, Any]]]:
         """
         Execute a query based on the provided parameters.
 
         Args:
             query_params (Dict[str, Any]): A dictionary containing query parameters.
-            db (Session): SQLAlchemy database session.
+            db (AsyncSession): SQLAlchemy async database session.
+            now (Optional[datetime]): The request time used for default time ranges; defaults to the current UTC time.
 
         Returns:
-            Tuple[int, List[Dict[str, Any]]]: A tuple containing the count of results and the results themselves.
+            Tuple[Optional[int], List[Dict[str, Any]]]: The total number of matching results (before
+                limit/offset; None if unknown) and the requested page of results.
         """
         analyzed_query = SmartQueryEngine._analyze_query(query_params)
-        optimized_query = SmartQueryEngine._optimize_query(analyzed_query)
-        data_source = SmartQueryEngine._select_data_source(optimized_query)
-        result = SmartQueryEngine._execute_optimized_query(optimized_query, data_source, db)
-        return len(result), result
+        optimized_query = SmartQueryEngine._optimize_query(analyzed_query, now)
+        plan = SmartQueryEngine._get_plan(optimized_query)
+        return await SmartQueryEngine._execute_optimized_query(optimized_query, plan, db)
 
     @staticmethod
     def _analyze_query(query_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,29 +155,36 @@ class SmartQueryEngine:
             "os_type": query_params.get('os_type'),
             "machine_id": query_params.get('machine_id'),
             "command": query_params.get('command'),
+            "command_match": query_params.get('command_match') or 'contains',
             "cpu_usage_gt": query_params.get('cpu_usage_gt'),
             "memory_usage_gt": query_params.get('memory_usage_gt'),
             "limit": query_params.get('limit', 100),
             "offset": query_params.get('offset', 0),
-            "aggregations": query_params.get('aggregations', []),
-            "group_by": query_params.get('group_by', [])
+            "aggregations": query_params.get('aggregations') or [],
+            "group_by": query_params.get('group_by') or []
         }
 
     @staticmethod
-    def _optimize_query(analyzed_query: Dict[str, Any]) -> Dict[str, Any]:
+    def _optimize_query(analyzed_query: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Optimize the query for better performance and data retrieval.
 
         Args:
             analyzed_query (Dict[str, Any]): The analyzed query parameters.
+            now (Optional[datetime]): The request time; defaults to the current UTC time.
 
         Returns:
             Dict[str, Any]: Optimized query parameters.
         """
         optimized = analyzed_query.copy()
 
+        # Timestamps are stored as naive UTC, so compare in naive UTC
+        now = as_utc_naive(now or datetime.now(timezone.utc))
+        for key in ('start_time', 'end_time'):
+            if optimized[key]:
+                optimized[key] = as_utc_naive(optimized[key])
+
         # Set default time range if not provided
-        now = datetime.now()
         if not optimized['start_time']:
             optimized['start_time'] = now - timedelta(days=30)
         if not optimized['end_time']:
@@ -124,11 +232,8 @@ class SmartQueryEngine:
         # Remove duplicates while preserving order
         unique_aggregations = list(dict.fromkeys(aggregations))
 
-        # Define priority order for aggregations
-        priority_order = ['count', 'sum', 'avg', 'min', 'max']
-
         # Sort aggregations based on priority
-        return sorted(unique_aggregations, key=lambda x: priority_order.index(x.split('_')[0]) if x.split('_')[0] in priority_order else len(priority_order))
+        return sorted(unique_aggregations, key=lambda x: _AGG_PRIORITY.get(x.partition('_')[0], _AGG_DEFAULT_PRIORITY))
 
     @staticmethod
     def _optimize_filters(query: Dict[str, Any]) -> Dict[str, Any]:
@@ -148,6 +253,11 @@ class SmartQueryEngine:
             if query.get(key) is not None:
                 filters[key] = query[key]
 
+        # os_type is always a list here, so callers iterate OS types rather than characters
+        if 'os_type' in filters:
+            os_type = filters['os_type']
+            filters['os_type'] = [os_type] if isinstance(os_type, str) else list(os_type)
+
         # Optimize numeric filters
         if query.get('cpu_usage_gt') is not None:
             filters['cpu_usage_gt'] = max(0, query['cpu_usage_gt'])
@@ -157,7 +267,68 @@ class SmartQueryEngine:
         return filters
 
     @staticmethod
-    def _select_data_source(optimized_query: Dict[str, Any]) -> str:
+    def _get_plan(optimized_query: Dict[str, Any]) -> CompiledPlan:
+        """
+        Fetch the compiled plan for the query's shape, compiling it on first use.
+        Only parameter values differ between queries of the same shape, so the
+        data source and SQL expressions are derived once per shape.
+
+        Args:
+            optimized_query (Dict[str, Any]): The optimized query parameters.
+
+        Returns:
+            CompiledPlan: The plan to bind the query's runtime values to.
+        """
+        shape = (
+            optimized_query.get('type'),
+            frozenset(optimized_query['filters']),
+            tuple(optimized_query.get('aggregations', [])),
+            tuple(optimized_query.get('group_by', [])),
+            _is_whole_days(optimized_query),
+        )
+        plan = _PLAN_CACHE.get(shape)
+        if plan is None:
+            if len(_PLAN_CACHE) >= _PLAN_CACHE_MAX_SIZE:
+                _PLAN_CACHE.clear()
+            plan = _PLAN_CACHE[shape] = SmartQueryEngine._compile_plan(optimized_query)
+        return plan
+
+    @staticmethod
+    def _compile_plan(optimized_query: Dict[str, Any]) -> CompiledPlan:
+        """
+        Select the data source and build the SQL select expressions for a query shape.
+
+        Args:
+            optimized_query (Dict[str, Any]): The optimized query parameters.
+
+        Returns:
+            CompiledPlan: The compiled plan.
+        """
+        data_source = SmartQueryEngine._select_data_source(optimized_query)
+        if data_source.name not in ('sql_store', 'hybrid_store'):
+            return CompiledPlan(data_source=data_source)
+
+        if data_source.name == 'hybrid_store':
+            # SQL aggregates per partition so they line up with the pre-aggregated data
+            group_cols = [func.date(ProcessData.timestamp, type_=Date).label('date'), ProcessData.os_type]
+        else:
+            group_cols = [_PROCESS_COLUMNS[col] for col in optimized_query.get('group_by', []) if col in _PROCESS_COLUMNS]
+        agg_entities = []
+        for agg in optimized_query.get('aggregations', []):
+            if agg in data_source.preagg:
+                continue
+            if agg in _PRE_AGGREGATED_SQL:
+                agg_entities.append(_PRE_AGGREGATED_SQL[agg].label(agg))
+                continue
+            agg_parts = agg.split('_')
+            if len(agg_parts) >= 2:
+                agg_type, column = agg_parts[0], '_'.join(agg_parts[1:])
+                if column in _PROCESS_COLUMNS:
+                    agg_entities.append(SmartQueryEngine._get_aggregation_func(agg_type, column).label(agg))
+        return CompiledPlan(data_source=data_source, group_cols=tuple(group_cols), agg_entities=tuple(agg_entities))
+
+    @staticmethod
+    def _select_data_source(optimized_query: Dict[str, Any]) -> DataSourcePlan:
         """
         Select the appropriate data source based on the query type and aggregations.
 
@@ -165,64 +336,104 @@ class SmartQueryEngine:
             optimized_query (Dict[str, Any]): The optimized query parameters.
 
         Returns:
-            str: The selected data source ('raw_data_store', 'pre_aggregated_store', or 'sql_store').
+            DataSourcePlan: The selected data source ('raw_data_store', 'pre_aggregated_store',
+                            'sql_store', or 'hybrid_store') and the aggregations each store serves.
         """
         if optimized_query.get('type') == 'real_time':
-            return 'raw_data_store'
+            return DataSourcePlan('raw_data_store')
         
         aggregations: List[str] = optimized_query.get('aggregations', [])
         
         if not aggregations:
-            return 'sql_store'  # Default to sql_store if no aggregations
+            return DataSourcePlan('sql_store')  # Default to sql_store if no aggregations
         
-        pre_aggregated_aggs = {'total_cpu_usage', 'total_memory_usage', 'process_count'}
-        if all(agg in pre_aggregated_aggs for agg in aggregations):
-            return 'pre_aggregated_store'
+        preagg = _PRE_AGGREGATED_AGGS.intersection(aggregations)
+        sql = frozenset(aggregations) - preagg
+        if not sql:
+            return DataSourcePlan('pre_aggregated_store', preagg=preagg)
+
+        # Pre-aggregates cover whole (date, os_type) partitions, so they can be merged with
+        # SQL results only when nothing else is grouped or filtered on and the time range
+        # is made of whole days; anything else would mix whole-day and exact-range values
+        if (preagg and not optimized_query.get('group_by') and set(optimized_query['filters']) <= {'os_type'}
+                and _is_whole_days(optimized_query)):
+            return DataSourcePlan('hybrid_store', preagg=preagg, sql=sql)
         
-        return 'sql_store'  # Default to sql_store for any other case
+        return DataSourcePlan('sql_store', sql=frozenset(aggregations))  # Default to sql_store for any other case
 
     @staticmethod
-    def _execute_optimized_query(optimized_query: Dict[str, Any], data_source: str, db: Session) -> List[Dict[str, Any]]:
+    async def _execute_optimized_query(optimized_query: Dict[str, Any], plan: CompiledPlan, db: AsyncSession) -> Tuple[Optional[int], List[Dict[str, Any]]]:
         """
-        Execute the optimized query on the selected data source.
+        Execute the optimized query on the data source selected by its plan.
 
         Args:
             optimized_query (Dict[str, Any]): The optimized query parameters.
-            data_source (str): The selected data source.
-            db (Session): SQLAlchemy database session.
+            plan (CompiledPlan): The compiled plan for the query's shape.
+            db (AsyncSession): SQLAlchemy async database session.
 
         Returns:
-            List[Dict[str, Any]]: Query results.
+            Tuple[Optional[int], List[Dict[str, Any]]]: The total result count and the query results.
 
         Raises:
             NotImplementedError: If the raw_data_store is selected (not implemented in this example).
         """
-        if data_source == 'pre_aggregated_store':
-            return SmartQueryEngine._execute_on_pre_aggregated(optimized_query)
-        elif data_source == 'sql_store':
-            return SmartQueryEngine._execute_on_sql(optimized_query, db)
+        data_source = plan.data_source
+        logger.debug("Executing query on %s (pre-aggregated: %s, sql: %s)",
+                     data_source.name, sorted(data_source.preagg), sorted(data_source.sql))
+        if data_source.name == 'pre_aggregated_store':
+            return await SmartQueryEngine._execute_on_pre_aggregated(optimized_query)
+        elif data_source.name == 'sql_store':
+            return await SmartQueryEngine._execute_on_sql(optimized_query, plan, db)
+        elif data_source.name == 'hybrid_store':
+            return await SmartQueryEngine._execute_hybrid(optimized_query, plan, db)
         else:
             raise NotImplementedError("Raw data store queries not implemented in this example")
 
     @staticmethod
-    @lru_cache(maxsize=128)
-    def _get_aggregated_data(partition_key: str) -> Dict[str, Any]:
+    async def _fetch_pre_aggregated(optimized_query: Dict[str, Any]) -> Dict[Tuple[date, str], Dict[str, Any]]:
         """
-        Retrieve and parse aggregated data from Redis with LRU caching.
+        Fetch the pre-aggregated data of every (date, os_type) partition in the query's range.
 
         Args:
-            partition_key (str): The key for the aggregated data in Redis.
+            optimized_query (Dict[str, Any]): The optimized query parameters.
 
         Returns:
-            Dict[str, Any]: Parsed aggregated data or an empty dict if not found.
+            Dict[Tuple[date, str], Dict[str, Any]]: Aggregated data by partition, for partitions that have any.
         """
-        aggregated_data = redis_client.get(f"agg_{partition_key}")
-        if aggregated_data:
-            return json.loads(aggregated_data)
-        return {}
+        os_types = optimized_query['filters'].get('os_type') or _DEFAULT_OS_TYPES
+        dates = _partition_dates(optimized_query)
+        partitions = [(date, os_type) for date in dates for os_type in os_types]
+
+        # All reads go out in one pipelined round trip, grouped per date. The date hash tag
+        # keeps one day's structures in one slot, so with a cluster client each date's group
+        # is served by a single node; the single-node client here just pipelines them.
+        # Read through on every query so freshly written aggregates are never served stale.
+        # Each date is formatted once into its key prefix rather than once per OS type
+        pipe = async_redis_client.pipeline(transaction=False)
+        for key_prefix in [aggregation_key_prefix(date.isoformat()) for date in dates]:
+            for key in [key_prefix + os_type for os_type in os_types]:
+                pipe.hmget(key + AGG_TOTALS, ['total_cpu_usage', 'total_memory_usage'])
+                pipe.scard(key + AGG_COMMANDS)
+                pipe.zrevrange(key + AGG_TOP_CPU, 0, AGG_TOP_N - 1, withscores=True)
+                pipe.zrevrange(key + AGG_TOP_MEMORY, 0, AGG_TOP_N - 1, withscores=True)
+        replies = await pipe.execute()
+
+        aggregated: Dict[Tuple[date, str], Dict[str, Any]] = {}
+        for i, partition in enumerate(partitions):
+            (total_cpu, total_memory), process_count, top_cpu, top_memory = replies[4 * i:4 * i + 4]
+            if total_cpu is None:
+                continue  # nothing ingested for this partition
+            aggregated[partition] = {
+                'total_cpu_usage': float(total_cpu),
+                'total_memory_usage': float(total_memory),
+                'process_count': process_count,
+                'top_cpu_processes': [{'command': command.decode(), 'cpu_usage': score} for command, score in top_cpu],
+                'top_memory_processes': [{'command': command.decode(), 'mem_usage': score} for command, score in top_memory],
+            }
+        return aggregated
 
     @staticmethod
-    def _execute_on_pre_aggregated(optimized_query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _execute_on_pre_aggregated(optimized_query: Dict[str, Any]) -> Tuple[Optional[int], List[Dict[str, Any]]]:
         """
         Execute the query on pre-aggregated data stored in Redis.
 
@@ -230,20 +441,59 @@ class SmartQueryEngine:
             optimized_query (Dict[str, Any]): The optimized query parameters.
 
         Returns:
-            List[Dict[str, Any]]: Query results from pre-aggregated data.
+            Tuple[Optional[int], List[Dict[str, Any]]]: The result count and the results from pre-aggregated data.
+        """
+        results = list((await SmartQueryEngine._fetch_pre_aggregated(optimized_query)).values())
+        return len(results), results
+
+    @staticmethod
+    async def _execute_hybrid(optimized_query: Dict[str, Any], plan: CompiledPlan, db: AsyncSession) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """
+        Serve the pre-aggregated aggregations from Redis and only the remaining ones
+        from SQL, merging both into one row per (date, os_type) partition.
+
+        Args:
+            optimized_query (Dict[str, Any]): The optimized query parameters.
+            plan (CompiledPlan): The compiled hybrid plan.
+            db (AsyncSession): SQLAlchemy async database session.
+
+        Returns:
+            Tuple[Optional[int], List[Dict[str, Any]]]: The number of partitions and the requested page
+                of rows, one per partition with its date, os_type and aggregations.
         """
-        start_date = optimized_query['start_time'].date()
-        end_date = optimized_query['end_time'].date()
-        current_date = start_date
-        results = []
-        while current_date <= end_date:
-            for os_type in optimized_query['filters'].get('os_type', ['windows', 'linux', 'mac']):
-                partition_key = f"{current_date}_{os_type}"
-                aggregated_data = SmartQueryEngine._get_aggregated_data(partition_key)
-                if aggregated_data:
-                    results.append(aggregated_data)
-            current_date += timedelta(days=1)
-        return results
+        # End-exclusive, so SQL covers exactly the partitions read from Redis
+        conditions = [
+            ProcessData.timestamp >= optimized_query['start_time'],
+            ProcessData.timestamp < optimized_query['end_time'],
+        ]
+        if optimized_query['filters'].get('os_type'):
+            conditions.append(ProcessData.os_type.in_(optimized_query['filters']['os_type']))
+        stmt = (
+            select(*plan.group_cols, *plan.agg_entities)
+            .where(*conditions)
+            .group_by(*plan.group_cols)
+        )
+
+        # Redis and SQL are independent, so wait for max(redis, sql) rather than their sum
+        partitions, sql_result = await asyncio.gather(
+            SmartQueryEngine._fetch_pre_aggregated(optimized_query),
+            db.execute(stmt),
+        )
+        logger.debug("Hybrid plan: %d pre-aggregated partitions, SQL for %s",
+                     len(partitions), sorted(plan.data_source.sql))
+
+        empty_row = dict.fromkeys(optimized_query['aggregations'])
+        merged: Dict[Tuple[date, str], Dict[str, Any]] = {}
+        for (partition_date, os_type), aggregated_data in partitions.items():
+            row = merged.setdefault((partition_date, os_type), {'date': partition_date, 'os_type': os_type, **empty_row})
+            row.update((agg, aggregated_data.get(agg)) for agg in plan.data_source.preagg)
+        for sql_row in sql_result.mappings():
+            key = (sql_row['date'], sql_row['os_type'])
+            merged.setdefault(key, {**empty_row}).update(sql_row)
+
+        offset = optimized_query.get('offset', 0)
+        limit = optimized_query.get('limit', 100)
+        return len(merged), [merged[key] for key in sorted(merged)][offset:offset + limit]
 
     @staticmethod
     def _get_aggregation_func(agg_type: str, column: str):
@@ -257,68 +507,110 @@ class SmartQueryEngine:
         Returns:
             function: SQLAlchemy aggregation function.
         """
-        agg_map = {
-            'avg': func.avg,
-            'max': func.max,
-            'min': func.min,
-            'sum': func.sum,
-            'count': func.count,
-        }
-        return agg_map.get(agg_type, func.avg)(getattr(ProcessData, column))
+        agg_func = _AGG_FUNCS.get(agg_type, func.avg)(_PROCESS_COLUMNS[column])
+        # Postgres averages integer columns as numeric, which asyncpg decodes to Decimal
+        # and orjson cannot serialize, so averages are returned as float
+        if agg_func.name == 'avg':
+            return cast(agg_func, Float)
+        return agg_func
 
     @staticmethod
-    def _execute_on_sql(optimized_query: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+    def _build_where_conditions(optimized_query: Dict[str, Any]) -> List[Any]:
         """
-        Execute the query on the SQL database.
+        Build the WHERE predicates for the time range and the equality/text filters.
 
         Args:
             optimized_query (Dict[str, Any]): The optimized query parameters.
-            db (Session): SQLAlchemy database session.
 
         Returns:
-            List[Dict[str, Any]]: Query results from SQL database.
+            List[Any]: SQLAlchemy boolean expressions to be ANDed together.
         """
-        query = db.query(ProcessData)
-        # # Apply time range filter
+        conditions = []
         if optimized_query.get('start_time'):
-            query = query.filter(ProcessData.timestamp >= optimized_query['start_time'])
+            conditions.append(ProcessData.timestamp >= optimized_query['start_time'])
         if optimized_query.get('end_time'):
-            query = query.filter(ProcessData.timestamp <= optimized_query['end_time'])
-        
-        # # Apply additional filters
+            conditions.append(ProcessData.timestamp <= optimized_query['end_time'])
         if optimized_query.get('os_type'):
-            query = query.filter(ProcessData.os_type == optimized_query['os_type'])
+            conditions.append(ProcessData.os_type == optimized_query['os_type'])
         if optimized_query.get('machine_id'):
-            query = query.filter(ProcessData.machine_id == optimized_query['machine_id'])
-        if optimized_query.get('command'):
-            query = query.filter(ProcessData.command.ilike(f"%{optimized_query['command']}%"))
+            conditions.append(ProcessData.machine_id == optimized_query['machine_id'])
+        command = optimized_query.get('command')
+        if command:
+            # All three forms can be served by the ix_pd_command_trgm trigram index, but only
+            # once the command is at least 3 characters long: shorter strings yield too few
+            # trigrams to narrow the scan. LIKE wildcards in the command match literally.
+            command_match = optimized_query.get('command_match')
+            if command_match == 'prefix':
+                conditions.append(ProcessData.command.ilike(f"{_escape_like(command)}%", escape='\\'))
+            elif command_match == 'similar':
+                conditions.append(ProcessData.command.op('%')(command))
+            else:
+                conditions.append(ProcessData.command.ilike(f"%{_escape_like(command)}%", escape='\\'))
+        return conditions
+
+    @staticmethod
+    async def _execute_on_sql(optimized_query: Dict[str, Any], plan: CompiledPlan, db: AsyncSession) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """
+        Execute the query on the SQL database.
+
+        Args:
+            optimized_query (Dict[str, Any]): The optimized query parameters.
+            plan (CompiledPlan): The compiled plan holding the select expressions.
+            db (AsyncSession): SQLAlchemy async database session.
+
+        Returns:
+            Tuple[Optional[int], List[Dict[str, Any]]]: The total number of matching rows or groups
+                (None if the page is past the end) and the requested page of results.
+        """
+        group_cols, agg_entities = plan.group_cols, plan.agg_entities
+
+        # Select the group columns and aggregates directly so the database aggregates
+        # instead of materializing full rows that are re-shaped afterwards
+        # The window count is evaluated before LIMIT/OFFSET, so every row also carries the
+        # total number of matching rows (or groups) without a second COUNT query
+        stmt = select(
+            *(group_cols + agg_entities or _RECORD_COLUMNS),
+            func.count().over().label(_TOTAL_COUNT_LABEL),
+        ).select_from(ProcessData)
+
+        conditions = SmartQueryEngine._build_where_conditions(optimized_query)
+
+        # Usage thresholds apply to the group totals when aggregating, to raw rows otherwise
+        thresholds = []
         if optimized_query.get('cpu_usage_gt') is not None:
-            query = query.filter(ProcessData.cpu_usage > optimized_query['cpu_usage_gt'])
+            thresholds.append((ProcessData.cpu_usage, optimized_query['cpu_usage_gt']))
         if optimized_query.get('memory_usage_gt') is not None:
-            query = query.filter(ProcessData.mem_usage > optimized_query['memory_usage_gt'])
-        
-        # # Apply grouping
-        group_by = optimized_query.get('group_by', [])
-        if group_by:
-            query = query.group_by(*[getattr(ProcessData, col) for col in group_by if hasattr(ProcessData, col)])
-        
-        # # Apply aggregations
-        aggregations = optimized_query.get('aggregations', [])
-        if aggregations:
-            select_entities = [getattr(ProcessData, col) for col in group_by if hasattr(ProcessData, col)]
-            for agg in aggregations:
-                agg_parts = agg.split('_')
-                if len(agg_parts) >= 2:
-                    agg_type, column = agg_parts[0], '_'.join(agg_parts[1:])
-                    if hasattr(ProcessData, column):
-                        select_entities.append(SmartQueryEngine._get_aggregation_func(agg_type, column).label(agg))
-            query = query.with_entities(*select_entities)
+            thresholds.append((ProcessData.mem_usage, optimized_query['memory_usage_gt']))
+        if agg_entities:
+            having = [func.sum(column) > threshold for column, threshold in thresholds]
+        else:
+            conditions.extend(column > threshold for column, threshold in thresholds)
+            having = []
+
+        # A single where()/having() call with all predicates instead of one clone per predicate
+        if conditions:
+            stmt = stmt.where(*conditions)
+        if having:
+            stmt = stmt.having(*having)
+
+        # # Apply grouping, with a stable order so limit/offset paginate deterministically
+        if group_cols:
+            stmt = stmt.group_by(*group_cols).order_by(*group_cols)
+        elif not agg_entities:
+            stmt = stmt.order_by(ProcessData.id)
         
         # # Apply limit and offset
         limit = optimized_query.get('limit', 100)
         offset = optimized_query.get('offset', 0)
-        query = query.limit(limit).offset(offset)
-
-        # Execute query and return results
-        results = query.all()
-        return [row._asdict() if hasattr(row, '_asdict') else row.to_dict() for row in results]
+        stmt = stmt.limit(limit).offset(offset)
+
+        # Stream rows in batches of _YIELD_PER so the raw rows and the dicts built from them
+        # are never both fully materialized, as they would be with .all()
+        result = await db.stream(stmt.execution_options(yield_per=_YIELD_PER))
+        total_count = 0 if offset == 0 else None
+        records = []
+        async for row in result.mappings():
+            record = dict(row)
+            total_count = record.pop(_TOTAL_COUNT_LABEL)
+            records.append(record)
+        return total_count, records
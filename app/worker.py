@@ -0,0 +1,33 @@
+"""
+arq worker that moves ingested batches from Redis into the SQL database and
+pre-aggregated store, outside of the API processes.
+
+Run with: arq app.worker.WorkerSettings
+"""
+
+from typing import Any, Dict
+
+from arq.connections import RedisSettings
+
+from app.config import settings
+from app.database import init_pg_pool, close_pg_pool
+from app.services.data_organizer import DataOrganizer
+
+
+async def process_and_store_data(ctx: Dict[str, Any], batch_id: str) -> None:
+    await DataOrganizer.process_and_store_data(batch_id)
+
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    await init_pg_pool()
+
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    await close_pg_pool()
+
+
+class WorkerSettings:
+    functions = [process_and_store_data]
+    redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
+    on_startup = startup
+    on_shutdown = shutdown
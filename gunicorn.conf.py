@@ -0,0 +1,15 @@
+# Gunicorn settings for the production entrypoint:
+#   gunicorn app.main:app -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"  # picks uvloop/httptools when installed
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * multiprocessing.cpu_count() + 1))
+keepalive = 5
+
+# Import the app once in the master so workers share it copy-on-write
+preload_app = True
+
+# No per-request access log lines
+accesslog = None
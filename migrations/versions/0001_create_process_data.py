@@ -0,0 +1,60 @@
+"""create process_data table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXED_COLUMNS = [
+    'id', 'command', 'pid', 'vsz', 'rss', 'cpu_usage', 'mem_usage', 'tty', 'stat',
+    'start_time', 'duration', 'timestamp', 'machine_name', 'machine_id',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases set up by the app's former startup create_all already hold exactly
+    # this schema; adopt them as-is so the later migrations can apply on top
+    if sa.inspect(op.get_bind()).has_table('process_data'):
+        return
+    op.create_table(
+        'process_data',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('command', sa.String(), nullable=True),
+        sa.Column('pid', sa.Integer(), nullable=True),
+        sa.Column('vsz', sa.Integer(), nullable=True),
+        sa.Column('rss', sa.Integer(), nullable=True),
+        sa.Column('cpu_usage', sa.Float(), nullable=True),
+        sa.Column('mem_usage', sa.Float(), nullable=True),
+        sa.Column('tty', sa.String(), nullable=True),
+        sa.Column('stat', sa.String(), nullable=True),
+        sa.Column('start_time', sa.String(), nullable=True),
+        sa.Column('duration', sa.String(), nullable=True),
+        sa.Column('user', sa.String(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('machine_name', sa.String(), nullable=True),
+        sa.Column('machine_id', sa.String(), nullable=True),
+        sa.Column('os_type', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    for column in _INDEXED_COLUMNS:
+        op.create_index(op.f(f'ix_process_data_{column}'), 'process_data', [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(_INDEXED_COLUMNS):
+        op.drop_index(op.f(f'ix_process_data_{column}'), table_name='process_data')
+    op.drop_table('process_data')
@@ -0,0 +1,46 @@
+"""narrow process_data indexes to queried columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Single-column indexes that are never filtered on, duplicate the primary key,
+# or are covered by the composite indexes below
+_DROPPED_COLUMNS = [
+    'id', 'pid', 'vsz', 'rss', 'cpu_usage', 'tty', 'stat', 'start_time',
+    'duration', 'timestamp', 'machine_name', 'machine_id',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in _DROPPED_COLUMNS:
+        op.drop_index(op.f(f'ix_process_data_{column}'), table_name='process_data')
+    op.create_index('ix_pd_ts_os', 'process_data', ['timestamp', 'os_type'], unique=False)
+    op.create_index('ix_pd_machine_ts', 'process_data', ['machine_id', 'timestamp'], unique=False)
+    op.create_index(
+        'ix_pd_cpu', 'process_data', ['cpu_usage'], unique=False,
+        postgresql_where=sa.text('cpu_usage > 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pd_cpu', table_name='process_data')
+    op.drop_index('ix_pd_machine_ts', table_name='process_data')
+    op.drop_index('ix_pd_ts_os', table_name='process_data')
+    for column in reversed(_DROPPED_COLUMNS):
+        op.create_index(op.f(f'ix_process_data_{column}'), 'process_data', [column], unique=False)
@@ -0,0 +1,34 @@
+"""replace the command b-tree index with a pg_trgm GIN index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # A b-tree on command can't serve ILIKE '%...%'; the trigram index can
+    op.drop_index(op.f('ix_process_data_command'), table_name='process_data')
+    op.create_index(
+        'ix_pd_command_trgm', 'process_data', ['command'], unique=False,
+        postgresql_using='gin', postgresql_ops={'command': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pd_command_trgm', table_name='process_data')
+    op.create_index(op.f('ix_process_data_command'), 'process_data', ['command'], unique=False)
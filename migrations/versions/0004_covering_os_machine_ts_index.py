@@ -0,0 +1,32 @@
+"""add a covering (os_type, machine_id, timestamp) index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # INCLUDE lets cpu/mem threshold checks run from the index without heap fetches
+    op.create_index(
+        'ix_pd_os_machine_ts', 'process_data', ['os_type', 'machine_id', sa.text('timestamp DESC')],
+        unique=False, postgresql_include=['cpu_usage', 'mem_usage'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pd_os_machine_ts', table_name='process_data')
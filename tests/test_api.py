@@ -3,7 +3,7 @@ import os
 import requests
 import time
 from colorama import init, Fore, Style
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 # Initialize colorama
 init(autoreset=True)
@@ -59,7 +59,7 @@ def test_ingest_data(file_path):
     content = read_file(file_path)
     os_type = determine_os_type(os.path.basename(file_path))
     meta_info = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "machine_name": "test-machine",
         "machine_id": "123456",
         "os_type": os_type
@@ -74,9 +74,10 @@ def test_ingest_data(file_path):
 
 def test_query_data(os_type):
     print(f"\n{Fore.CYAN}Testing Data Query...{Style.RESET_ALL}")
+    now = datetime.now(timezone.utc)
     query_params = {
-        "start_time": (datetime.now() - timedelta(days=1)).isoformat(),
-        "end_time": datetime.now().isoformat(),
+        "start_time": (now - timedelta(days=1)).isoformat(),
+        "end_time": now.isoformat(),
         "os_type": os_type,
         "machine_id": "123456",
         "limit": 10,
@@ -104,9 +105,10 @@ def test_not_found_scenarios():
 
 def test_aggregation_query():
     print(f"\n{Fore.CYAN}Testing Aggregation Query...{Style.RESET_ALL}")
+    now = datetime.now(timezone.utc)
     query_params = {
-        "start_time": (datetime.now() - timedelta(days=7)).isoformat(),
-        "end_time": datetime.now().isoformat(),
+        "start_time": (now - timedelta(days=7)).isoformat(),
+        "end_time": now.isoformat(),
         "aggregations": ['total_cpu_usage', 'total_memory_usage', 'process_count'],
         "group_by": ["os_type", "machine_id"]
     }
@@ -123,7 +125,7 @@ def test_duplicate_data_insertion(file_path):
     content = read_file(file_path)
     os_type = determine_os_type(os.path.basename(file_path))
     meta_info = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "machine_name": "test-machine",
         "machine_id": "123456",
         "os_type": os_type
@@ -143,9 +145,10 @@ def test_duplicate_data_insertion(file_path):
 
 def test_large_data_query():
     print(f"\n{Fore.CYAN}Testing Large Data Query...{Style.RESET_ALL}")
+    now = datetime.now(timezone.utc)
     query_params = {
-        "start_time": (datetime.now() - timedelta(days=30)).isoformat(),
-        "end_time": datetime.now().isoformat(),
+        "start_time": (now - timedelta(days=30)).isoformat(),
+        "end_time": now.isoformat(),
         "limit": 10000,  # Requesting a large number of records
         "offset": 0
     }
@@ -0,0 +1,111 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.redis_client import AGG_TOP_N
+from app.services import data_organizer
+from app.services.data_organizer import DataOrganizer
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
+
+    async def execute(self):
+        return []
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.pipe = RecordingPipeline()
+
+    def pipeline(self, transaction=True):
+        return self.pipe
+
+
+def _record(command, cpu_usage, mem_usage):
+    return {'partition_key': '2024-01-01_linux', 'command': command, 'cpu_usage': cpu_usage, 'mem_usage': mem_usage}
+
+
+def test_redis_aggregations_are_additive(monkeypatch):
+    redis = RecordingRedis()
+    monkeypatch.setattr(data_organizer, 'async_redis_client', redis)
+    records = [_record('a', 1.0, 2.0), _record('a', 3.0, 1.0), _record('b', 2.0, 4.0)]
+
+    asyncio.run(DataOrganizer._update_redis_aggregations(records))
+
+    key = 'agg:{2024-01-01}:linux'
+    calls = redis.pipe.calls
+    assert ('hincrbyfloat', (key + ':totals', 'total_cpu_usage', 6.0), {}) in calls
+    assert ('hincrbyfloat', (key + ':totals', 'total_memory_usage', 7.0), {}) in calls
+    [(_, (commands_key, *commands), _)] = [call for call in calls if call[0] == 'sadd']
+    assert commands_key == key + ':commands' and sorted(commands) == ['a', 'b']
+    # Peaks per command, merged keeping the higher score, then trimmed to the top N
+    assert ('zadd', (key + ':top_cpu', {'a': 3.0, 'b': 2.0}), {'gt': True}) in calls
+    assert ('zadd', (key + ':top_memory', {'b': 4.0, 'a': 2.0}), {'gt': True}) in calls
+    assert ('zremrangebyrank', (key + ':top_cpu', 0, -(AGG_TOP_N + 1)), {}) in calls
+    assert not [call for call in calls if call[0] == 'set']
+
+
+def test_top_peaks_keeps_the_highest_commands():
+    partition = [_record(f'cmd{i}', float(i), 0.0) for i in range(AGG_TOP_N + 5)] + [_record('cmd0', 100.0, 0.0)]
+
+    peaks = DataOrganizer._top_peaks(partition, 'cpu_usage')
+
+    assert len(peaks) == AGG_TOP_N
+    assert peaks['cmd0'] == 100.0
+    assert 'cmd1' not in peaks
+
+
+def test_meta_info_is_stored_as_strings(monkeypatch):
+    class StoringRedis:
+        async def set(self, key, value):
+            self.value = value
+
+    redis = StoringRedis()
+    monkeypatch.setattr(data_organizer, 'async_redis_client', redis)
+    meta_info = {'timestamp': '2024-01-01T00:00:00', 'machine_name': 'host', 'machine_id': 123456, 'os_type': 'linux'}
+
+    asyncio.run(DataOrganizer.store_process_data_in_redis(meta_info, []))
+
+    assert orjson.loads(redis.value)['meta_info']['machine_id'] == '123456'
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _line_batches(*chunks):
+    async def collect():
+        return [batch async for batch in DataOrganizer._iter_line_batches(_chunks(*chunks))]
+    return asyncio.run(collect())
+
+
+def test_line_split_across_chunks_is_carried_over():
+    assert _line_batches(b'first\nsec', b'ond\nthird') == [['first'], ['second'], ['third']]
+
+
+def test_multibyte_character_split_across_chunks_is_decoded():
+    encoded = 'café\n'.encode()
+    assert _line_batches(encoded[:4], encoded[4:]) == [[], ['café']]
+
+
+def test_crlf_line_endings_are_stripped():
+    assert _line_batches(b'first\r\nsecond\r', b'\n') == [['first'], ['second']]
+
+
+def test_header_only_stream_is_rejected():
+    header = b'USER         PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND\n'
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(DataOrganizer.receive_and_parse_stream('linux', {}, _chunks(header)))
+
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+from sqlalchemy import Float
+from sqlalchemy.dialects import postgresql
+
+from app.services.query_engine import SmartQueryEngine, _partition_dates
+
+
+def _plan_for(query_params):
+    analyzed_query = SmartQueryEngine._analyze_query(query_params)
+    optimized_query = SmartQueryEngine._optimize_query(analyzed_query)
+    return SmartQueryEngine._get_plan(optimized_query)
+
+
+def test_plan_for_query_without_aggregations_or_group_by():
+    # QueryParams.model_dump() sends aggregations=None and no group_by at all
+    plan = _plan_for({'aggregations': None, 'limit': 100, 'offset': 0})
+
+    assert plan.group_cols == ()
+    assert plan.agg_entities == ()
+
+
+def test_plan_is_cached_per_query_shape():
+    first = _plan_for({'aggregations': ['avg_cpu_usage'], 'group_by': ['os_type'], 'machine_id': 'a'})
+    second = _plan_for({'aggregations': ['avg_cpu_usage'], 'group_by': ['os_type'], 'machine_id': 'b'})
+
+    assert first is second
+
+
+def test_hybrid_plan_only_for_whole_day_ranges():
+    query = {'aggregations': ['total_cpu_usage', 'avg_cpu_usage'], 'os_type': 'linux'}
+    whole_days = _plan_for({**query, 'start_time': datetime(2024, 1, 1), 'end_time': datetime(2024, 1, 3)})
+    partial_day = _plan_for({**query, 'start_time': datetime(2024, 1, 1, 6), 'end_time': datetime(2024, 1, 3)})
+
+    assert whole_days.data_source.name == 'hybrid_store'
+    assert partial_day.data_source.name == 'sql_store'
+
+
+def test_command_wildcards_match_literally():
+    for command_match, pattern in (('contains', '%50\\%\\_cpu%'), ('prefix', '50\\%\\_cpu%')):
+        [condition] = SmartQueryEngine._build_where_conditions({'command': '50%_cpu', 'command_match': command_match})
+        compiled = condition.compile()
+
+        assert list(compiled.params.values()) == [pattern]
+        assert "ESCAPE '\\'" in str(compiled)
+
+
+def test_integer_column_average_is_float():
+    expr = SmartQueryEngine._get_aggregation_func('avg', 'vsz')
+
+    assert isinstance(expr.type, Float)
+    assert str(expr.compile(dialect=postgresql.dialect())) == 'CAST(avg(process_data.vsz) AS FLOAT)'
+
+
+def test_sql_fallback_computes_pre_aggregated_aggregations():
+    aggregations = ['total_cpu_usage', 'total_memory_usage', 'process_count', 'avg_cpu_usage']
+    plan = _plan_for({'aggregations': aggregations, 'start_time': datetime(2024, 1, 1, 6), 'end_time': datetime(2024, 1, 3)})
+
+    assert plan.data_source.name == 'sql_store'
+    assert sorted(entity.name for entity in plan.agg_entities) == sorted(aggregations)
+
+
+def test_partition_dates_exclude_a_midnight_end_time():
+    def dates(start_time, end_time):
+        return _partition_dates({'start_time': start_time, 'end_time': end_time})
+
+    assert dates(datetime(2024, 1, 1), datetime(2024, 1, 3)) == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert dates(datetime(2024, 1, 1), datetime(2024, 1, 3, 12)) == [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
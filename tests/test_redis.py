@@ -1,19 +1,36 @@
 from app.redis_client import redis_client
-import json
+import orjson
 from colorama import init, Fore, Style
 
+SCAN_BATCH_SIZE = 500
+
 
 def inspect_redis_content():
     print(f"\n{Fore.CYAN}Inspecting Redis Content...{Style.RESET_ALL}")
-    keys = redis_client.keys('*')
+    # SCAN instead of KEYS so the server is never blocked, with values fetched one pipelined batch at a time
+    batch = []
+    for key in redis_client.scan_iter(match='*', count=SCAN_BATCH_SIZE):
+        batch.append(key)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            print_batch(batch)
+            batch = []
+    if batch:
+        print_batch(batch)
+
+def print_batch(keys):
+    pipe = redis_client.pipeline(transaction=False)
     for key in keys:
+        pipe.get(key)
+    # Non-string keys (e.g. arq's job queue) answer GET with an error instead of failing the whole batch
+    for key, value in zip(keys, pipe.execute(raise_on_error=False)):
         key_str = key.decode('utf-8')
-        value = redis_client.get(key)
+        if not isinstance(value, bytes):
+            continue
         try:
-            value_json = json.loads(value)
+            value_json = orjson.loads(value)
             print(f"{Fore.YELLOW}Key:{Style.RESET_ALL} {key_str}")
-            print(f"{Fore.YELLOW}Value:{Style.RESET_ALL} {json.dumps(value_json, indent=2)}")
-        except json.JSONDecodeError:
+            print(f"{Fore.YELLOW}Value:{Style.RESET_ALL} {orjson.dumps(value_json, option=orjson.OPT_INDENT_2).decode()}")
+        except orjson.JSONDecodeError:
             print(f"{Fore.YELLOW}Key:{Style.RESET_ALL} {key_str}")
             print(f"{Fore.YELLOW}Value:{Style.RESET_ALL} {value.decode('utf-8')}")
         print("---")